@@ -0,0 +1,121 @@
+"""
+Helpers shared by the CoFeMnTi DOS/PDOS and band structure plotting scripts
+"""
+
+import fnmatch
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Only open plot windows when asked to (SHOW_PLOTS=1); batch runs just save
+INTERACTIVE = os.environ.get('SHOW_PLOTS') == '1'
+
+# Resolution of saved PNGs; override with PLOT_DPI (e.g. 300 for publication)
+SAVE_DPI = int(os.environ.get('PLOT_DPI', '150'))
+
+@functools.lru_cache(maxsize=4)
+def read_dos_fermi(filename):
+    """Get Fermi energy from DOS file"""
+    with open(filename, 'r') as f:
+        header = f.readline()
+        fermi_str = header.split('EFermi =')[1].split('eV')[0].strip()
+        fermi_energy = float(fermi_str)
+    return fermi_energy
+
+# --- DOS/PDOS helpers ---
+
+def energy_window(e_shift, emin=-8, emax=8):
+    """Slice of the ascending energy grid covering the plotted range, plus one point each side"""
+    lo = max(np.searchsorted(e_shift, emin) - 1, 0)
+    hi = np.searchsorted(e_shift, emax, side='right') + 1
+    return slice(lo, hi)
+
+def fill_polygon(e_shift, dos):
+    """Closed polygon between a DOS curve and zero, for a PolyCollection fill"""
+    return np.column_stack([np.r_[e_shift, e_shift[::-1]], np.r_[dos, np.zeros_like(dos)]])
+
+@functools.lru_cache(maxsize=None)
+def _list_work_dir():
+    """List the working directory once per run"""
+    return tuple(os.listdir('.'))
+
+@functools.lru_cache(maxsize=None)
+def pdos_files(pattern):
+    """Return the PDOS files matching a glob pattern (cached per pattern)"""
+    return tuple(fnmatch.filter(_list_work_dir(), pattern))
+
+def read_first_parallel(*jobs):
+    """Read the first file of each list concurrently, all in one thread pool
+
+    Each job is a (reader, file_lists) pair. Returns one result list per job,
+    with None where no file was found.
+    """
+    n_reads = sum(1 for _, file_lists in jobs for files in file_lists if files)
+    with ThreadPoolExecutor(max_workers=max(n_reads, 1)) as ex:
+        futures = [[ex.submit(reader, files[0]) if files else None for files in file_lists]
+                   for reader, file_lists in jobs]
+        return [[future.result() if future else None for future in job] for job in futures]
+
+# --- Band structure helpers ---
+
+def read_bands_data(filename):
+    """Read band structure data with column information"""
+    # Header comments and blank lines between bands are skipped by the parser;
+    # columns are typically k-point, energy (possibly spin-resolved)
+    data = pd.read_csv(filename, sep=r'\s+', comment='#', header=None,
+                       dtype=np.float32, engine='c').values
+
+    return data
+
+def load_bands_cached(txt_path):
+    """Read band structure data, caching the parsed array as .npy for reloads"""
+    npy_path = txt_path + '.npy'
+
+    # Reuse the binary cache if it is at least as new as the text file.
+    # Unreadable caches and ones written before the switch to float32 are
+    # regenerated, so a bad cache never looks like a missing bands file.
+    if os.path.exists(npy_path) and os.path.getmtime(npy_path) >= os.path.getmtime(txt_path):
+        try:
+            cached = np.load(npy_path, mmap_mode='r')
+        except (OSError, ValueError):
+            cached = None
+        if cached is not None and cached.dtype == np.float32:
+            return cached
+
+    data = read_bands_data(txt_path)
+
+    # Write to a temporary file and rename it into place, so an interrupted
+    # or concurrent run never leaves a truncated cache behind
+    tmp_path = f'{npy_path}.{os.getpid()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            np.save(f, data)
+        os.replace(tmp_path, npy_path)
+    except OSError:
+        pass  # Read-only directory; just skip the cache
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    return data
+
+def detect_breaks(k_coord, jump_fraction=0.5):
+    """Indices where a new band segment starts, bracketed by 0 and len(k_coord)
+
+    A segment starts wherever k decreases (k resets for a new band) or jumps
+    forward by more than jump_fraction * max|k| (a discontinuous k-path).
+    """
+    k = np.asarray(k_coord, dtype=np.float64)
+    if k.size == 0:
+        return np.zeros(2, dtype=np.int64)
+    dk = np.diff(k)
+    jumps = (dk < 0) | (dk > jump_fraction * np.max(np.abs(k)))
+    return np.concatenate([[0], np.flatnonzero(jumps) + 1, [k.size]])
+
+def band_segments(k_coord, energy, band_breaks):
+    """Split the (k, E) points at band_breaks into per-band segments for a LineCollection"""
+    points = np.column_stack([k_coord, energy])
+    return [points[s:e] for s, e in zip(band_breaks[:-1], band_breaks[1:]) if e - s > 1]
@@ -5,48 +5,41 @@ Improved band structure plot for CoFeMnTi with proper discontinuity handling
 
 import numpy as np
 import matplotlib.pyplot as plt
+from matplotlib.collections import LineCollection
 
-def read_dos_fermi(filename):
-    """Get Fermi energy from DOS file"""
-    with open(filename, 'r') as f:
-        header = f.readline()
-        fermi_str = header.split('EFermi =')[1].split('eV')[0].strip()
-        fermi_energy = float(fermi_str)
-    return fermi_energy
+from _plot_common import (INTERACTIVE, SAVE_DPI, band_segments, detect_breaks, load_bands_cached,
+                          read_dos_fermi)
 
-def plot_bands_improved():
+# Simplify dense band polylines when rendering
+plt.rcParams['path.simplify'] = True
+plt.rcParams['agg.path.chunksize'] = 10000
+
+def plot_bands_improved(fermi_energy=None):
     """Plot band structure with proper handling of k-point segments"""
-    fermi_energy = read_dos_fermi('CoFeMnTi.dos')
+    if fermi_energy is None:
+        fermi_energy = read_dos_fermi('CoFeMnTi.dos')
     
     # Read the corrected .gnu file
     try:
-        data = np.loadtxt('CoFeMnTi_fixed.bands.gnu')
+        data = load_bands_cached('CoFeMnTi_fixed.bands.gnu')
     except:
         print("Using original bands file as fallback")
-        data = np.loadtxt('CoFeMnTi.bands.gnu')
+        data = load_bands_cached('CoFeMnTi.bands.gnu')
     
     k_coord = data[:, 0]
     energy = data[:, 1]
     
     # Find band indices where k-coordinate resets (indicates new band)
-    band_breaks = [0]
-    for i in range(1, len(k_coord)):
-        if k_coord[i] < k_coord[i-1]:  # k-coordinate resets
-            band_breaks.append(i)
-    band_breaks.append(len(k_coord))
-    
-    plt.figure(figsize=(12, 8))
-    
-    # Plot each band separately to avoid connecting discontinuous segments
-    for i in range(len(band_breaks)-1):
-        start_idx = band_breaks[i]
-        end_idx = band_breaks[i+1]
-        
-        k_segment = k_coord[start_idx:end_idx]
-        e_segment = energy[start_idx:end_idx] - fermi_energy
-        
-        if len(k_segment) > 1:  # Only plot if segment has more than one point
-            plt.plot(k_segment, e_segment, 'b-', linewidth=1.2, alpha=0.8)
+    band_breaks = detect_breaks(k_coord)
+    
+    fig, ax = plt.subplots(figsize=(12, 8))
+    
+    # Draw all bands as one collection to avoid connecting discontinuous segments
+    # (only segments with more than one point are kept)
+    segs = band_segments(k_coord, energy - fermi_energy, band_breaks)
+    ax.add_collection(LineCollection(segs, colors='b', linewidths=1.2, alpha=0.8,
+                                     rasterized=True))
+    ax.autoscale_view()
     
     # Add Fermi level
     plt.axhline(0, color='r', linestyle='--', alpha=0.8, linewidth=2, label='Fermi Level')
@@ -72,24 +65,27 @@ def plot_bands_improved():
     plt.xlabel('k-path', fontsize=14)
     plt.ylabel('Energy - E_F (eV)', fontsize=14)
     plt.title('Band Structure - CoFeMnTi Quaternary Heusler (Corrected)', fontsize=16)
-    plt.legend(fontsize=12)
+    plt.legend(fontsize=12, loc='upper left')
     plt.grid(True, alpha=0.3)
     plt.ylim(-6, 6)
     plt.xlim(0, max_k if 'max_k' in locals() else None)
     
     plt.tight_layout()
-    plt.savefig('CoFeMnTi_bands_corrected.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    plt.savefig('CoFeMnTi_bands_corrected.png', dpi=SAVE_DPI, bbox_inches='tight')
+    if INTERACTIVE:
+        plt.show()
+    plt.close(fig)
     print("Corrected band structure plot saved as: CoFeMnTi_bands_corrected.png")
 
-def analyze_band_structure():
+def analyze_band_structure(fermi_energy=None):
     """Analyze the band structure data"""
-    fermi_energy = read_dos_fermi('CoFeMnTi.dos')
+    if fermi_energy is None:
+        fermi_energy = read_dos_fermi('CoFeMnTi.dos')
     
     try:
-        data = np.loadtxt('CoFeMnTi_fixed.bands.gnu')
+        data = load_bands_cached('CoFeMnTi_fixed.bands.gnu')
     except:
-        data = np.loadtxt('CoFeMnTi.bands.gnu')
+        data = load_bands_cached('CoFeMnTi.bands.gnu')
     
     energy = data[:, 1] - fermi_energy
     
@@ -111,8 +107,9 @@ if __name__ == "__main__":
     print("Creating improved band structure plot for CoFeMnTi")
     print("=" * 55)
     
-    plot_bands_improved()
-    analyze_band_structure()
+    fermi_energy = read_dos_fermi('CoFeMnTi.dos')
+    plot_bands_improved(fermi_energy)
+    analyze_band_structure(fermi_energy)
     
     print("\\n" + "=" * 55)
     print("Improved band structure analysis completed!")
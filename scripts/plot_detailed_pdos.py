@@ -4,8 +4,17 @@ Detailed PDOS plot for CoFeMnTi showing s and d orbital contributions
 """
 
 import numpy as np
+import pandas as pd
+import matplotlib as mpl
 import matplotlib.pyplot as plt
-import glob
+from matplotlib.collections import PolyCollection
+
+from _plot_common import (INTERACTIVE, SAVE_DPI, energy_window, fill_polygon, pdos_files,
+                          read_dos_fermi, read_first_parallel)
+
+# Simplify dense PDOS polylines when rendering
+plt.rcParams['path.simplify'] = True
+plt.rcParams['agg.path.chunksize'] = 10000
 
 def read_dos_file(filename):
     """Read DOS file and return energy, dos_up, dos_down, fermi_energy"""
@@ -13,8 +22,10 @@ def read_dos_file(filename):
         header = f.readline()
         fermi_str = header.split('EFermi =')[1].split('eV')[0].strip()
         fermi_energy = float(fermi_str)
+        # Parse the data from the same handle, continuing after the header
+        data = pd.read_csv(f, sep=r'\s+', comment='#', header=None,
+                           dtype=np.float32, engine='c').values
     
-    data = np.loadtxt(filename, comments='#')
     energy = data[:, 0]
     dos_up = data[:, 1]
     dos_down = -data[:, 2]
@@ -23,54 +34,72 @@ def read_dos_file(filename):
 
 def read_pdos_d(filename):
     """Read d-orbital PDOS file"""
-    data = np.loadtxt(filename, comments='#')
+    data = pd.read_csv(filename, sep=r'\s+', comment='#', header=None,
+                       dtype=np.float32, engine='c').values
     energy = data[:, 0]
-    pdos_up = np.sum(data[:, 3::2], axis=1)  # Sum all d-orbital spin-up
-    pdos_down = -np.sum(data[:, 4::2], axis=1)  # Sum all d-orbital spin-down
+    # Columns after E, ldos_up, ldos_down are (up, down) pairs per d-orbital;
+    # reduce both spins in one pass
+    tail = data[:, 3:]
+    if tail.shape[1] % 2:
+        tail = tail[:, :-1]
+    spin_sums = tail.reshape(tail.shape[0], -1, 2).sum(axis=1)
+    pdos_up = spin_sums[:, 0]  # Sum all d-orbital spin-up
+    pdos_down = -spin_sums[:, 1]  # Sum all d-orbital spin-down
     return energy, pdos_up, pdos_down
 
 def read_pdos_s(filename):
     """Read s-orbital PDOS file"""
-    data = np.loadtxt(filename, comments='#')
+    data = pd.read_csv(filename, sep=r'\s+', comment='#', header=None,
+                       dtype=np.float32, engine='c').values
     energy = data[:, 0]
     pdos_up = data[:, 1]  # s-orbital spin-up
     pdos_down = -data[:, 2]  # s-orbital spin-down
     return energy, pdos_up, pdos_down
 
-def plot_detailed_pdos():
+def plot_detailed_pdos(fermi_energy=None):
     """Plot detailed PDOS with s and d contributions for each atom"""
-    _, _, _, fermi_energy = read_dos_file('CoFeMnTi.dos')
+    if fermi_energy is None:
+        fermi_energy = read_dos_fermi('CoFeMnTi.dos')
     
     atoms = ['Fe', 'Co', 'Mn', 'Ti']
     colors = ['blue', 'green', 'red', 'orange']
     
     fig, axes = plt.subplots(2, 2, figsize=(16, 12))
     axes = axes.flatten()
+    pastel = mpl.colormaps['Pastel1']
+    
+    # Find s and d orbital files and read them concurrently
+    s_files = [pdos_files(f"CoFeMnTi.pdos_atm#{i+1}({atom})_wfc*s)") for i, atom in enumerate(atoms)]
+    d_files = [pdos_files(f"CoFeMnTi.pdos_atm#{i+1}({atom})_wfc*d)") for i, atom in enumerate(atoms)]
+    s_pdos, d_pdos = read_first_parallel((read_pdos_s, s_files), (read_pdos_d, d_files))
     
     for i, atom in enumerate(atoms):
-        # Find s and d orbital files
-        s_files = glob.glob(f"CoFeMnTi.pdos_atm#{i+1}({atom})_wfc*s)")
-        d_files = glob.glob(f"CoFeMnTi.pdos_atm#{i+1}({atom})_wfc*d)")
-        
         ax = axes[i]
         
         # Plot d-orbitals
-        if d_files:
-            energy, d_up, d_down = read_pdos_d(d_files[0])
-            ax.plot(energy - fermi_energy, d_up, color=colors[i], 
+        if d_pdos[i] is not None:
+            energy, d_up, d_down = d_pdos[i]
+            e_shift = energy - fermi_energy
+            w = energy_window(e_shift)
+            e_shift, d_up, d_down = e_shift[w], d_up[w], d_down[w]
+            ax.plot(e_shift, d_up, color=colors[i], 
                    label=f'{atom} d-up', linewidth=2)
-            ax.plot(energy - fermi_energy, d_down, color=colors[i], 
+            ax.plot(e_shift, d_down, color=colors[i], 
                    linestyle='--', label=f'{atom} d-down', linewidth=2)
-            ax.fill_between(energy - fermi_energy, d_up, alpha=0.3, color=colors[i])
-            ax.fill_between(energy - fermi_energy, d_down, alpha=0.3, color=colors[i])
+            ax.add_collection(PolyCollection([fill_polygon(e_shift, d_up), fill_polygon(e_shift, d_down)],
+                                             color=colors[i], alpha=0.3))
+            ax.autoscale_view()
         
         # Plot s-orbitals (lighter color)
-        if s_files:
-            energy_s, s_up, s_down = read_pdos_s(s_files[0])
-            light_color = plt.cm.get_cmap('Pastel1')(i)
-            ax.plot(energy_s - fermi_energy, s_up, color=light_color, 
+        if s_pdos[i] is not None:
+            energy_s, s_up, s_down = s_pdos[i]
+            e_shift_s = energy_s - fermi_energy
+            w = energy_window(e_shift_s)
+            e_shift_s, s_up, s_down = e_shift_s[w], s_up[w], s_down[w]
+            light_color = pastel(i)
+            ax.plot(e_shift_s, s_up, color=light_color, 
                    label=f'{atom} s-up', linewidth=1, alpha=0.8)
-            ax.plot(energy_s - fermi_energy, s_down, color=light_color, 
+            ax.plot(e_shift_s, s_down, color=light_color, 
                    linestyle=':', label=f'{atom} s-down', linewidth=1, alpha=0.8)
         
         ax.axvline(0, color='k', linestyle='-', alpha=0.7, linewidth=0.8)
@@ -82,28 +111,40 @@ def plot_detailed_pdos():
         ax.set_xlim(-8, 8)
     
     plt.tight_layout()
-    plt.savefig('CoFeMnTi_detailed_pdos.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    plt.savefig('CoFeMnTi_detailed_pdos.png', dpi=SAVE_DPI, bbox_inches='tight')
+    if INTERACTIVE:
+        plt.show()
+    plt.close(fig)
     print("Detailed PDOS plot saved as: CoFeMnTi_detailed_pdos.png")
 
-def plot_orbital_comparison():
+def plot_orbital_comparison(fermi_energy=None):
     """Plot comparison of d-orbital contributions from all atoms"""
-    _, _, _, fermi_energy = read_dos_file('CoFeMnTi.dos')
+    if fermi_energy is None:
+        fermi_energy = read_dos_fermi('CoFeMnTi.dos')
     
     atoms = ['Fe', 'Co', 'Mn', 'Ti']
     colors = ['blue', 'green', 'red', 'orange']
     
-    plt.figure(figsize=(12, 8))
+    fig = plt.figure(figsize=(12, 8))
+    
+    d_files = [pdos_files(f"CoFeMnTi.pdos_atm#{i+1}({atom})_wfc*d)") for i, atom in enumerate(atoms)]
+    (d_pdos,) = read_first_parallel((read_pdos_d, d_files))
     
+    # Spin-up fills for all atoms are drawn as one collection
+    fills, fill_colors = [], []
     for i, atom in enumerate(atoms):
-        d_files = glob.glob(f"CoFeMnTi.pdos_atm#{i+1}({atom})_wfc*d)")
-        
-        if d_files:
-            energy, d_up, d_down = read_pdos_d(d_files[0])
-            plt.plot(energy - fermi_energy, d_up, color=colors[i], 
+        if d_pdos[i] is not None:
+            energy, d_up, d_down = d_pdos[i]
+            e_shift = energy - fermi_energy
+            w = energy_window(e_shift)
+            e_shift, d_up, d_down = e_shift[w], d_up[w], d_down[w]
+            plt.plot(e_shift, d_up, color=colors[i], 
                     label=f'{atom} d-up', linewidth=2)
-            plt.fill_between(energy - fermi_energy, d_up, alpha=0.2, color=colors[i])
+            fills.append(fill_polygon(e_shift, d_up))
+            fill_colors.append(colors[i])
     
+    plt.gca().add_collection(PolyCollection(fills, color=fill_colors, alpha=0.2))
+    plt.gca().autoscale_view()
     plt.axvline(0, color='k', linestyle='--', alpha=0.8, linewidth=1.5, label='Fermi Level')
     plt.xlabel('Energy - E_F (eV)')
     plt.ylabel('PDOS (states/eV)')
@@ -112,16 +153,19 @@ def plot_orbital_comparison():
     plt.grid(True, alpha=0.3)
     plt.xlim(-8, 8)
     plt.tight_layout()
-    plt.savefig('CoFeMnTi_d_orbital_comparison.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    plt.savefig('CoFeMnTi_d_orbital_comparison.png', dpi=SAVE_DPI, bbox_inches='tight')
+    if INTERACTIVE:
+        plt.show()
+    plt.close(fig)
     print("d-orbital comparison plot saved as: CoFeMnTi_d_orbital_comparison.png")
 
 if __name__ == "__main__":
     print("Creating detailed PDOS plots for CoFeMnTi")
     print("=" * 50)
     
-    plot_detailed_pdos()
-    plot_orbital_comparison()
+    fermi_energy = read_dos_fermi('CoFeMnTi.dos')
+    plot_detailed_pdos(fermi_energy)
+    plot_orbital_comparison(fermi_energy)
     
     print("\n" + "=" * 50)
     print("Detailed PDOS plots completed!")
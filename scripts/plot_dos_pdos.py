@@ -4,14 +4,19 @@ Plot DOS and PDOS for CoFeMnTi Quaternary Heusler alloy
 """
 
 import numpy as np
+import pandas as pd
 import matplotlib.pyplot as plt
-import glob
-import os
+from matplotlib.collections import PolyCollection
+
+from _plot_common import (INTERACTIVE, SAVE_DPI, energy_window, fill_polygon, pdos_files,
+                          read_dos_fermi, read_first_parallel)
 
 # Set up matplotlib for better plots
 plt.rcParams['figure.figsize'] = (12, 8)
 plt.rcParams['font.size'] = 12
 plt.rcParams['lines.linewidth'] = 2
+plt.rcParams['path.simplify'] = True
+plt.rcParams['agg.path.chunksize'] = 10000
 
 def read_dos_file(filename):
     """Read DOS file and return energy, dos_up, dos_down, fermi_energy"""
@@ -20,8 +25,10 @@ def read_dos_file(filename):
         # Extract Fermi energy from header
         fermi_str = header.split('EFermi =')[1].split('eV')[0].strip()
         fermi_energy = float(fermi_str)
+        # Parse the data from the same handle, continuing after the header
+        data = pd.read_csv(f, sep=r'\s+', comment='#', header=None,
+                           dtype=np.float32, engine='c').values
     
-    data = np.loadtxt(filename, comments='#')
     energy = data[:, 0]
     dos_up = data[:, 1]
     dos_down = -data[:, 2]  # Negative for spin-down
@@ -30,14 +37,20 @@ def read_dos_file(filename):
 
 def read_pdos_file(filename):
     """Read PDOS file and return energy, pdos_up, pdos_down"""
-    data = np.loadtxt(filename, comments='#')
+    data = pd.read_csv(filename, sep=r'\s+', comment='#', header=None,
+                       dtype=np.float32, engine='c').values
     energy = data[:, 0]
     
     # For d-orbitals, sum all d-orbital contributions
     if '_wfc#' in filename and '(d)' in filename:
         # For d-orbitals: columns are E, ldos_up, ldos_down, then 5 d-orbitals * 2 spins
-        pdos_up = np.sum(data[:, 3::2], axis=1)  # Sum odd columns (d-orbital spin-up)
-        pdos_down = -np.sum(data[:, 4::2], axis=1)  # Sum even columns (d-orbital spin-down), negative
+        # Group the tail into (up, down) pairs and reduce both spins in one pass
+        tail = data[:, 3:]
+        if tail.shape[1] % 2:
+            tail = tail[:, :-1]
+        spin_sums = tail.reshape(tail.shape[0], -1, 2).sum(axis=1)
+        pdos_up = spin_sums[:, 0]  # d-orbital spin-up
+        pdos_down = -spin_sums[:, 1]  # d-orbital spin-down, negative
     else:
         # For s,p orbitals: usually ldos_up, ldos_down in columns 1,2
         pdos_up = data[:, 1] if data.shape[1] > 1 else data[:, 1]
@@ -45,16 +58,30 @@ def read_pdos_file(filename):
     
     return energy, pdos_up, pdos_down
 
-def plot_total_dos():
-    """Plot total DOS"""
+def _prepare_figure(fig, figsize):
+    """Return fig cleared and resized to figsize, or a new figure if fig is None"""
+    if fig is None:
+        return plt.figure(figsize=figsize)
+    fig.clear()
+    fig.set_size_inches(figsize)
+    plt.figure(fig)  # Make it current for the pyplot calls that follow
+    return fig
+
+def plot_total_dos(fig=None):
+    """Plot total DOS (draws into fig if given, otherwise a new figure)"""
+    own_fig = fig is None
     energy, dos_up, dos_down, fermi_energy = read_dos_file('CoFeMnTi.dos')
+    e_shift = energy - fermi_energy
+    w = energy_window(e_shift)
+    e_shift, dos_up, dos_down = e_shift[w], dos_up[w], dos_down[w]
     
-    plt.figure(figsize=(10, 6))
-    plt.plot(energy - fermi_energy, dos_up, 'b-', label='Spin Up', linewidth=1.5)
-    plt.plot(energy - fermi_energy, dos_down, 'r-', label='Spin Down', linewidth=1.5)
+    fig = _prepare_figure(fig, (10, 6))
+    plt.plot(e_shift, dos_up, 'b-', label='Spin Up', linewidth=1.5)
+    plt.plot(e_shift, dos_down, 'r-', label='Spin Down', linewidth=1.5)
     plt.axvline(0, color='k', linestyle='--', alpha=0.7, label='Fermi Level')
-    plt.fill_between(energy - fermi_energy, dos_up, alpha=0.3, color='blue')
-    plt.fill_between(energy - fermi_energy, dos_down, alpha=0.3, color='red')
+    plt.gca().add_collection(PolyCollection([fill_polygon(e_shift, dos_up), fill_polygon(e_shift, dos_down)],
+                                            color=['blue', 'red'], alpha=0.3))
+    plt.gca().autoscale_view()
     
     plt.xlabel('Energy - E_F (eV)')
     plt.ylabel('DOS (states/eV)')
@@ -63,37 +90,47 @@ def plot_total_dos():
     plt.grid(True, alpha=0.3)
     plt.xlim(-8, 8)
     plt.tight_layout()
-    plt.savefig('CoFeMnTi_total_dos.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    plt.savefig('CoFeMnTi_total_dos.png', dpi=SAVE_DPI, bbox_inches='tight')
+    if INTERACTIVE:
+        plt.show()
+    if own_fig:
+        plt.close(fig)
     print("Total DOS plot saved as: CoFeMnTi_total_dos.png")
 
-def plot_atomic_pdos():
+def plot_atomic_pdos(fermi_energy=None, fig=None):
     """Plot atomic-resolved PDOS for d-orbitals"""
+    own_fig = fig is None
     # Get Fermi energy from DOS file
-    _, _, _, fermi_energy = read_dos_file('CoFeMnTi.dos')
+    if fermi_energy is None:
+        fermi_energy = read_dos_fermi('CoFeMnTi.dos')
     
     # Find d-orbital PDOS files for each atom
     atoms = ['Fe', 'Co', 'Mn', 'Ti']
     colors = ['blue', 'green', 'red', 'orange']
     
-    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    fig = _prepare_figure(fig, (15, 10))
+    axes = fig.subplots(2, 2)
     axes = axes.flatten()
     
+    # Find the d-orbital file for each atom and read them concurrently
+    d_files = [pdos_files(f"CoFeMnTi.pdos_atm#{i+1}({atom})_wfc*d)") for i, atom in enumerate(atoms)]
+    (d_pdos,) = read_first_parallel((read_pdos_file, d_files))
+    
     for i, atom in enumerate(atoms):
-        # Find the d-orbital file for this atom
-        d_files = glob.glob(f"CoFeMnTi.pdos_atm#{i+1}({atom})_wfc*d)")
-        
-        if d_files:
-            filename = d_files[0]
-            energy, pdos_up, pdos_down = read_pdos_file(filename)
+        if d_pdos[i] is not None:
+            energy, pdos_up, pdos_down = d_pdos[i]
+            e_shift = energy - fermi_energy
+            w = energy_window(e_shift)
+            e_shift, pdos_up, pdos_down = e_shift[w], pdos_up[w], pdos_down[w]
             
-            axes[i].plot(energy - fermi_energy, pdos_up, color=colors[i], 
+            axes[i].plot(e_shift, pdos_up, color=colors[i], 
                         label=f'{atom} d-up', linewidth=1.5)
-            axes[i].plot(energy - fermi_energy, pdos_down, color=colors[i], 
+            axes[i].plot(e_shift, pdos_down, color=colors[i], 
                         linestyle='--', label=f'{atom} d-down', linewidth=1.5)
             axes[i].axvline(0, color='k', linestyle='-', alpha=0.7, linewidth=0.8)
-            axes[i].fill_between(energy - fermi_energy, pdos_up, alpha=0.3, color=colors[i])
-            axes[i].fill_between(energy - fermi_energy, pdos_down, alpha=0.3, color=colors[i])
+            axes[i].add_collection(PolyCollection([fill_polygon(e_shift, pdos_up), fill_polygon(e_shift, pdos_down)],
+                                                  color=colors[i], alpha=0.3))
+            axes[i].autoscale_view()
             
             axes[i].set_xlabel('Energy - E_F (eV)')
             axes[i].set_ylabel('PDOS (states/eV)')
@@ -103,27 +140,36 @@ def plot_atomic_pdos():
             axes[i].set_xlim(-8, 8)
     
     plt.tight_layout()
-    plt.savefig('CoFeMnTi_atomic_pdos.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    plt.savefig('CoFeMnTi_atomic_pdos.png', dpi=SAVE_DPI, bbox_inches='tight')
+    if INTERACTIVE:
+        plt.show()
+    if own_fig:
+        plt.close(fig)
     print("Atomic PDOS plot saved as: CoFeMnTi_atomic_pdos.png")
 
-def plot_combined_dos_pdos():
+def plot_combined_dos_pdos(fig=None):
     """Plot combined DOS and PDOS in one figure"""
+    own_fig = fig is None
     # Get total DOS
     energy, dos_up, dos_down, fermi_energy = read_dos_file('CoFeMnTi.dos')
+    e_shift = energy - fermi_energy
+    w = energy_window(e_shift)
+    e_shift, dos_up, dos_down = e_shift[w], dos_up[w], dos_down[w]
     
     # Get d-orbital PDOS for each atom
     atoms = ['Fe', 'Co', 'Mn', 'Ti']
     colors = ['blue', 'green', 'red', 'orange']
     
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(12, 10))
+    fig = _prepare_figure(fig, (12, 10))
+    ax1, ax2 = fig.subplots(2, 1)
     
     # Plot total DOS
-    ax1.plot(energy - fermi_energy, dos_up, 'k-', label='Total Spin Up', linewidth=2)
-    ax1.plot(energy - fermi_energy, dos_down, 'k--', label='Total Spin Down', linewidth=2)
+    ax1.plot(e_shift, dos_up, 'k-', label='Total Spin Up', linewidth=2)
+    ax1.plot(e_shift, dos_down, 'k--', label='Total Spin Down', linewidth=2)
     ax1.axvline(0, color='gray', linestyle='-', alpha=0.8, linewidth=1)
-    ax1.fill_between(energy - fermi_energy, dos_up, alpha=0.2, color='black')
-    ax1.fill_between(energy - fermi_energy, dos_down, alpha=0.2, color='black')
+    ax1.add_collection(PolyCollection([fill_polygon(e_shift, dos_up), fill_polygon(e_shift, dos_down)],
+                                      color='black', alpha=0.2))
+    ax1.autoscale_view()
     
     ax1.set_ylabel('Total DOS (states/eV)')
     ax1.set_title('CoFeMnTi - Total DOS and Atomic d-orbital PDOS')
@@ -131,19 +177,26 @@ def plot_combined_dos_pdos():
     ax1.grid(True, alpha=0.3)
     ax1.set_xlim(-8, 8)
     
-    # Plot atomic PDOS (d-orbitals only)
+    # Plot atomic PDOS (d-orbitals only); fills are drawn as one collection
+    d_files = [pdos_files(f"CoFeMnTi.pdos_atm#{i+1}({atom})_wfc*d)") for i, atom in enumerate(atoms)]
+    (d_pdos,) = read_first_parallel((read_pdos_file, d_files))
+    
+    fills, fill_colors = [], []
     for i, atom in enumerate(atoms):
-        d_files = glob.glob(f"CoFeMnTi.pdos_atm#{i+1}({atom})_wfc*d)")
-        
-        if d_files:
-            filename = d_files[0]
-            energy_pdos, pdos_up, pdos_down = read_pdos_file(filename)
+        if d_pdos[i] is not None:
+            energy_pdos, pdos_up, pdos_down = d_pdos[i]
+            e_shift_pdos = energy_pdos - fermi_energy
+            w = energy_window(e_shift_pdos)
+            e_shift_pdos, pdos_up = e_shift_pdos[w], pdos_up[w]
             
             # Plot only spin-up for clarity
-            ax2.plot(energy_pdos - fermi_energy, pdos_up, color=colors[i], 
+            ax2.plot(e_shift_pdos, pdos_up, color=colors[i], 
                     label=f'{atom} d-up', linewidth=1.5)
-            ax2.fill_between(energy_pdos - fermi_energy, pdos_up, alpha=0.3, color=colors[i])
+            fills.append(fill_polygon(e_shift_pdos, pdos_up))
+            fill_colors.append(colors[i])
     
+    ax2.add_collection(PolyCollection(fills, color=fill_colors, alpha=0.3))
+    ax2.autoscale_view()
     ax2.axvline(0, color='gray', linestyle='-', alpha=0.8, linewidth=1)
     ax2.set_xlabel('Energy - E_F (eV)')
     ax2.set_ylabel('PDOS (states/eV)')
@@ -152,8 +205,11 @@ def plot_combined_dos_pdos():
     ax2.set_xlim(-8, 8)
     
     plt.tight_layout()
-    plt.savefig('CoFeMnTi_combined_dos_pdos.png', dpi=300, bbox_inches='tight')
-    plt.show()
+    plt.savefig('CoFeMnTi_combined_dos_pdos.png', dpi=SAVE_DPI, bbox_inches='tight')
+    if INTERACTIVE:
+        plt.show()
+    if own_fig:
+        plt.close(fig)
     print("Combined DOS/PDOS plot saved as: CoFeMnTi_combined_dos_pdos.png")
 
 def print_magnetic_analysis():
@@ -174,14 +230,23 @@ if __name__ == "__main__":
     print("Plotting DOS and PDOS for CoFeMnTi Quaternary Heusler Alloy")
     print("=" * 60)
     
+    fermi_energy = read_dos_fermi('CoFeMnTi.dos')
+    
+    # Batch runs draw all three plots into one reused figure; interactive
+    # runs keep separate figures since closing a window destroys it
+    fig = None if INTERACTIVE else plt.figure(figsize=(12, 8))
+    
     # Plot total DOS
-    plot_total_dos()
+    plot_total_dos(fig=fig)
     
     # Plot atomic PDOS
-    plot_atomic_pdos()
+    plot_atomic_pdos(fermi_energy, fig=fig)
     
     # Plot combined figure
-    plot_combined_dos_pdos()
+    plot_combined_dos_pdos(fig=fig)
+    
+    if fig is not None:
+        plt.close(fig)
     
     # Print magnetic analysis
     print_magnetic_analysis()